@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import timedelta
 from enum import Enum
 
@@ -14,6 +15,8 @@ class ButtonEventType(Enum):
 class ButtonEvent:
     long_press: bool
     character: str
+    # monotonic time the handler created the event (used for latency traces)
+    created: float = field(default_factory=time.monotonic, compare=False, repr=False)
 
     @property
     def event_type(self) -> ButtonEventType:
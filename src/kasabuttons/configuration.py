@@ -10,6 +10,12 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from .buttons import ButtonEvent
 
+# use the C-accelerated safe loader when libyaml is available
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+TOML_EXTENSIONS = (".toml", ".tml")
+YAML_EXTENSIONS = (".yaml", ".yml")
+
 
 class DeviceAction(Enum):
     TOGGLE = "toggle"
@@ -53,11 +59,24 @@ class Configuration(BaseSettings):
 
     @staticmethod
     def load_from_file(file_name: str):
-        file_parts = os.path.splitext(file_name)
-        if file_parts[1].lower() in (".toml", ".tml"):
-            with open(file_name, "rb") as f:
-                return Configuration(**tomllib.load(f))
-        elif file_parts[1].lower() in (".yaml", ".yml"):
-            with open(file_name, "rb") as f:
-                return Configuration(**yaml.load(f, yaml.Loader))
-        return Configuration()
+        if not is_config_file(file_name):
+            return Configuration()
+        with open(file_name, "rb") as f:
+            return Configuration(**parse_config_data(file_name, f.read()))
+
+
+def is_config_file(file_name: str) -> bool:
+    """
+    whether the file extension is one of the supported (toml/yaml) formats.
+    """
+    return os.path.splitext(file_name)[1].lower() in TOML_EXTENSIONS + YAML_EXTENSIONS
+
+
+def parse_config_data(file_name: str, data: bytes) -> dict:
+    """
+    parses the raw contents of a toml or yaml config file (format chosen by the
+    extension of `file_name`) into a dict ready for validation.
+    """
+    if os.path.splitext(file_name)[1].lower() in TOML_EXTENSIONS:
+        return tomllib.loads(data.decode())
+    return yaml.load(data, YamlLoader) or {}
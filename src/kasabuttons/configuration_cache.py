@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from .configuration import Configuration, is_config_file, parse_config_data
+
+# bump when the layout of the cache entry changes
+CACHE_FORMAT = 2
+
+# never copied into the cache; they always come from the environment/.env
+CREDENTIAL_FIELDS = ("kasa_username", "kasa_password")
+
+
+@dataclass
+class CompiledConfiguration:
+    configuration: Configuration
+    cache_hit: bool
+    elapsed: float  # total seconds spent loading (including the cache write)
+    cache_file: Path | None
+    parse_time: float | None = None  # parse + validate only, None on a cache hit
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return Path(base).expanduser() / "kasabuttons"
+
+
+def cache_file_for(file_name: str, cache_dir: Path | None = None) -> Path:
+    cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+    source_key = hashlib.sha256(os.path.abspath(file_name).encode()).hexdigest()
+    return cache_dir / f"{source_key[:32]}.json"
+
+
+def _read_cache(cache_file: Path) -> dict | None:
+    try:
+        with open(cache_file, "rb") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.debug(f"ignoring unreadable configuration cache: {cache_file}")
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _write_cache(cache_file: Path, entry: dict):
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # os.replace makes the update atomic
+        fd, temp_name = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(temp_name, cache_file)
+        # earlier versions pickled the merged configuration, credentials included
+        cache_file.with_suffix(".pickle").unlink(missing_ok=True)
+    except (OSError, TypeError, ValueError):
+        # TypeError/ValueError: values json can't hold (e.g. toml datetimes)
+        logger.warning(f"unable to write configuration cache: {cache_file}")
+
+
+def compile_configuration(
+    file_name: str, cache_dir: Path | None = None, force: bool = False
+) -> CompiledConfiguration:
+    """
+    loads a configuration file, reusing the parsed contents cached (as JSON)
+    from an earlier load when the source file is unchanged, which skips the
+    comparatively slow TOML/YAML parsing. The cached data is still validated
+    on every load, so values from the environment/.env are applied exactly as
+    for an uncached load. A matching mtime/size skips hashing the source
+    entirely; a changed mtime with identical content (sha256) still counts as
+    a hit. Files that contain credentials are never cached.
+    `force` always re-parses, re-validates and rewrites the cache.
+    """
+    started = time.perf_counter()
+    if not is_config_file(file_name):
+        configuration = Configuration.load_from_file(file_name)
+        elapsed = time.perf_counter() - started
+        return CompiledConfiguration(
+            configuration,
+            cache_hit=False,
+            elapsed=elapsed,
+            cache_file=None,
+            parse_time=elapsed,
+        )
+    source = os.path.abspath(file_name)
+    stat = os.stat(source)
+    cache_file = cache_file_for(file_name, cache_dir)
+    entry = None if force else _read_cache(cache_file)
+    if entry and (entry.get("format"), entry.get("source")) != (CACHE_FORMAT, source):
+        entry = None
+
+    if entry and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return CompiledConfiguration(
+            Configuration(**entry["data"]),
+            cache_hit=True,
+            elapsed=time.perf_counter() - started,
+            cache_file=cache_file,
+        )
+
+    with open(source, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_hit = bool(entry) and entry["sha256"] == digest
+    parse_time = None
+    if cache_hit:
+        data = entry["data"]
+        configuration = Configuration(**data)
+    else:
+        parse_started = time.perf_counter()
+        data = parse_config_data(file_name, raw)
+        configuration = Configuration(**data)
+        parse_time = time.perf_counter() - parse_started
+    if any(field in data for field in CREDENTIAL_FIELDS):
+        logger.debug(f"not caching {file_name}: it contains credentials")
+        return CompiledConfiguration(
+            configuration,
+            cache_hit=False,
+            elapsed=time.perf_counter() - started,
+            cache_file=None,
+            parse_time=parse_time,
+        )
+    _write_cache(
+        cache_file,
+        {
+            "format": CACHE_FORMAT,
+            "source": source,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "data": data,
+        },
+    )
+    return CompiledConfiguration(
+        configuration,
+        cache_hit=cache_hit,
+        elapsed=time.perf_counter() - started,
+        cache_file=cache_file,
+        parse_time=parse_time,
+    )
+
+
+def load_cached_configuration(
+    file_name: str, cache_dir: Path | None = None
+) -> Configuration:
+    compiled = compile_configuration(file_name, cache_dir=cache_dir)
+    logger.debug(
+        f"configuration loaded in {compiled.elapsed * 1000:.1f}ms "
+        f"({'cached' if compiled.cache_hit else 'compiled'})"
+    )
+    return compiled.configuration
@@ -1,4 +1,5 @@
 import asyncio
+import time
 
 from kasa import Device, DeviceConfig, Discover, KasaException
 from loguru import logger
@@ -10,8 +11,9 @@ from .keyboard_handlers.base_handler import BaseAsyncKeyboardStatus
 
 
 class KasaButtonsCore:
-    def __init__(self, configuration: Configuration):
+    def __init__(self, configuration: Configuration, recorder=None):
         self.configuration = configuration
+        self._recorder = recorder
         self._button_actions = {
             button.button_text: button for button in configuration.buttons
         }
@@ -32,14 +34,19 @@ class KasaButtonsCore:
 
     @classmethod
     async def create(
-        cls, configuration: Configuration, keyboard_handler: BaseAsyncKeyboardStatus
+        cls,
+        configuration: Configuration,
+        keyboard_handler: BaseAsyncKeyboardStatus,
+        recorder=None,
     ):
         """
         async class method to create a new KasaButtonCore instance and
         hydrate the data with calls to async methods like (update_device_list)
         and connecting up with the AsyncKeyboardStatus handler.
+        An optional `recorder` (see `recording.TraceRecorder`) records button
+        events and device request timings.
         """
-        self = cls(configuration)
+        self = cls(configuration, recorder=recorder)
         self._button_queue, self._keyboard_handler_instance = (
             keyboard_handler.keyboard_button_handler(chars=self._button_actions.keys())
         )
@@ -52,14 +59,19 @@ class KasaButtonsCore:
 
     @classmethod
     async def run(
-        cls, configuration: Configuration, keyboard_handler: BaseAsyncKeyboardStatus
+        cls,
+        configuration: Configuration,
+        keyboard_handler: BaseAsyncKeyboardStatus,
+        recorder=None,
     ):
         """
         comprehensive method that async sets up a new instance, initializes the device
         list and then enters the loop waiting on events.
         """
         self = await cls.create(
-            configuration=configuration, keyboard_handler=keyboard_handler
+            configuration=configuration,
+            keyboard_handler=keyboard_handler,
+            recorder=recorder,
         )
         await self.loop()
 
@@ -81,6 +93,40 @@ class KasaButtonsCore:
                 )
         return device_config
 
+    def _resolve_device_config(self, button_event: ButtonEvent) -> DeviceConfig | None:
+        """
+        resolves the device configuration a button event should act on.
+        """
+        return self._get_device_config(button_event.character)
+
+    async def _stop_background_update(self):
+        """
+        stops (and waits for) the background device list update task.
+        """
+        self._stop_update = True
+        if self._update_task:
+            # Cancel the update task
+            self._update_task.cancel()
+            try:
+                await self._update_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _discover_devices(self) -> dict:
+        """
+        discovers the devices on the network (overridden when replaying traces).
+        """
+        return await Discover.discover(
+            credentials=self.configuration.credentials,
+            discovery_timeout=self.configuration.discovery_timeout,
+        )
+
+    async def _connect_device(self, device_config: DeviceConfig) -> Device:
+        """
+        connects to a device (overridden when replaying traces).
+        """
+        return await Device.connect(config=device_config)
+
     async def _perform_action(self, device: Device, button_event: ButtonEvent):
         """
         method that actually calls the appropriate action method based on the button
@@ -106,31 +152,45 @@ class KasaButtonsCore:
         """
         while True:
             button_event = await self._button_queue.get()
-            if device_config := self._get_device_config(button_event.character):
+            if self._recorder:
+                self._recorder.record_button_event(button_event)
+            if device_config := self._resolve_device_config(button_event):
+                started = time.perf_counter()
+                connected = acted = None
+                error = None
+                device_name = self._button_actions[button_event.character].device_name
+                if device_name == "~LAST~":
+                    # until connected, the address is all we know of the device
+                    device_name = str(getattr(device_config, "host", device_config))
                 try:
                     async with async_wrapped_device(
-                        await Device.connect(
-                            config=device_config,
-                        )
+                        await self._connect_device(device_config)
                     ) as device:
+                        connected = time.perf_counter()
+                        device_name = device.alias or device_name
                         logger.debug("successfully connected to device")
                         logger.debug(device.state_information)
                         self._last_device_config = device.config
                         await self._perform_action(device, button_event)
-                except KasaException:
+                        acted = time.perf_counter()
+                except KasaException as ex:
+                    error = ex
                     logger.exception("Exception attempting to connect to device")
-                except AttributeError:
+                except AttributeError as ex:
+                    error = ex
                     logger.exception("Attribute Error")
+                if self._recorder:
+                    self._recorder.record_device_request(
+                        button_event,
+                        device_name,
+                        connect_time=connected - started if connected else None,
+                        action_time=acted - connected if acted else None,
+                        total_time=time.perf_counter() - started,
+                        error=error,
+                    )
             elif button_event.character == "exit":
                 logger.debug("received 'exit' character")
-                self._stop_update = True
-                if self._update_task:
-                    # Cancel the update task
-                    self._update_task.cancel()
-                    try:
-                        await self._update_task
-                    except asyncio.CancelledError:
-                        pass
+                await self._stop_background_update()
                 break
 
     async def update_device_list(self):
@@ -148,10 +208,7 @@ class KasaButtonsCore:
             for button in self.configuration.buttons
         }
         logger.debug("attempting to discover kasa/tapo devices")
-        devices = await Discover.discover(
-            credentials=self.configuration.credentials,
-            discovery_timeout=self.configuration.discovery_timeout,
-        )
+        devices = await self._discover_devices()
         for device in devices.values():
             await device.update()
             logger.debug(f"found device alias: {device.alias}")
@@ -0,0 +1,215 @@
+import asyncio
+import dataclasses
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from enum import Enum
+from fnmatch import fnmatchcase
+
+from kasa import Device, KasaException
+from loguru import logger
+
+from .configuration import Configuration, DeviceAction
+from .core import KasaButtonsCore
+from .kasa_utils import async_wrapped_device
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DEVICE_TIMEOUT = 5.0  # seconds per device (update + action)
+
+
+class FleetAction(Enum):
+    ON = "on"
+    OFF = "off"
+    TOGGLE = "toggle"
+    DIMPLUS = "dim+"
+    DIMMINUS = "dim-"
+    BRIGHTNESS = "brightness"
+
+
+class FleetStatus(Enum):
+    OK = "ok"
+    SKIPPED = "skipped"  # device doesn't support the action (e.g. dimming a plug)
+    ERROR = "error"
+    TIMEOUT = "timeout"
+
+
+@dataclass
+class FleetResult:
+    device: str
+    host: str | None
+    status: FleetStatus
+    elapsed: float
+    is_on: bool | None = None
+    brightness: int | None = None
+    error: str | None = None
+
+    @property
+    def failed(self) -> bool:
+        return self.status in (FleetStatus.ERROR, FleetStatus.TIMEOUT)
+
+    def to_dict(self) -> dict:
+        result = dataclasses.asdict(self)
+        result["status"] = self.status.value
+        result["elapsed"] = round(self.elapsed, 3)
+        return result
+
+
+class KasaFleet:
+    """
+    Runs an operation (status or an action) on many devices at once. Devices
+    are discovered with the core's discovery and acted on with its action
+    methods, with at most `concurrency` devices in flight and each device
+    limited to `timeout` seconds. Results are yielded as they finish.
+    """
+
+    def __init__(
+        self,
+        configuration: Configuration,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_DEVICE_TIMEOUT,
+    ):
+        self.core = KasaButtonsCore(configuration)
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    @staticmethod
+    def _selector(
+        names: tuple[str, ...] = (), pattern: str | None = None
+    ) -> Callable[[str | None], bool]:
+        """
+        builds the device alias filter: exact `names` and/or a glob `pattern`
+        (everything when neither is given).
+        """
+
+        def selected(alias: str | None) -> bool:
+            if not names and not pattern:
+                return True
+            if alias is None:
+                return False
+            return alias in names or bool(pattern and fnmatchcase(alias, pattern))
+
+        return selected
+
+    async def _run_on_device(
+        self,
+        device: Device,
+        operation: Callable[[Device], Awaitable[FleetStatus]],
+        semaphore: asyncio.Semaphore,
+        selected: Callable[[str | None], bool],
+    ) -> FleetResult | None:
+        async with semaphore:
+            started = time.perf_counter()
+            status = FleetStatus.OK
+            error = None
+            try:
+                async with asyncio.timeout(self.timeout):
+                    async with async_wrapped_device(device):
+                        await device.update()
+                        if not selected(device.alias):
+                            return None
+                        status = await operation(device)
+            except TimeoutError:
+                status = FleetStatus.TIMEOUT
+                error = f"no response within {self.timeout}s"
+            except (KasaException, AttributeError) as ex:
+                status = FleetStatus.ERROR
+                error = str(ex) or repr(ex)
+            except Exception as ex:
+                # e.g. ValueError for an out of range brightness; one bad
+                # device must not end a whole fleet run
+                host = getattr(device, "host", None)
+                logger.exception(f"unexpected error from device {host}")
+                status = FleetStatus.ERROR
+                error = str(ex) or repr(ex)
+            alias = getattr(device, "alias", None)
+            if error and not selected(alias):
+                # with --device/--match given, a device whose name couldn't be
+                # resolved (e.g. Tapo before update) wasn't asked for
+                host = getattr(device, "host", None)
+                logger.warning(f"ignoring unidentified device {host}: {error}")
+                return None
+            result = FleetResult(
+                device=alias or str(getattr(device, "host", "unknown")),
+                host=getattr(device, "host", None),
+                status=status,
+                elapsed=time.perf_counter() - started,
+                error=error,
+            )
+            if not error:
+                result.is_on = not device.is_off
+                result.brightness = device.state_information.get("Brightness")
+            return result
+
+    async def run(
+        self,
+        operation: Callable[[Device], Awaitable[FleetStatus]],
+        names: tuple[str, ...] = (),
+        pattern: str | None = None,
+    ) -> AsyncIterator[FleetResult]:
+        """
+        discovers the devices and runs `operation` on the selected ones,
+        yielding each result as soon as its device finishes.
+        """
+        devices = await self.core._discover_devices()
+        logger.debug(f"discovered {len(devices)} devices")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        selected = self._selector(names, pattern)
+        tasks = []
+        for device in devices.values():
+            # the discovery info usually has the alias; only devices without
+            # one (e.g. Tapo, no nickname until update) need connecting to
+            alias = getattr(device, "alias", None)
+            if alias is not None and not selected(alias):
+                await device.disconnect()
+                continue
+            tasks.append(self._run_on_device(device, operation, semaphore, selected))
+        for next_result in asyncio.as_completed(tasks):
+            if result := await next_result:
+                yield result
+
+    def status(
+        self, names: tuple[str, ...] = (), pattern: str | None = None
+    ) -> AsyncIterator[FleetResult]:
+        async def report(device: Device) -> FleetStatus:
+            return FleetStatus.OK
+
+        return self.run(report, names=names, pattern=pattern)
+
+    def apply(
+        self,
+        action: FleetAction,
+        value: int | None = None,
+        dim_states: list[int] | None = None,
+        names: tuple[str, ...] = (),
+        pattern: str | None = None,
+    ) -> AsyncIterator[FleetResult]:
+        """
+        applies `action` to the selected devices. `value` is the brightness
+        percentage for BRIGHTNESS, `dim_states` the states cycled by DIMPLUS
+        and DIMMINUS.
+        """
+
+        async def perform(device: Device) -> FleetStatus:
+            match action:
+                case FleetAction.ON:
+                    await device.turn_on()
+                case FleetAction.OFF:
+                    await device.turn_off()
+                case FleetAction.TOGGLE:
+                    await self.core.toggle_device(device)
+                case (
+                    FleetAction.DIMPLUS | FleetAction.DIMMINUS | FleetAction.BRIGHTNESS
+                ):
+                    if not device.state_information.get("Brightness"):
+                        return FleetStatus.SKIPPED
+                    if action == FleetAction.BRIGHTNESS:
+                        await device.set_brightness(value)
+                    else:
+                        await self.core.dim_device(
+                            device, DeviceAction(action.value), dim_states
+                        )
+            # refresh so the reported state reflects the action
+            await device.update()
+            return FleetStatus.OK
+
+        return self.run(perform, names=names, pattern=pattern)
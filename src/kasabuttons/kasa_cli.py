@@ -1,12 +1,27 @@
 import asyncio
+import json
+import os
 import platform
 
 import click
+import yaml
+from click.core import ParameterSource
 from loguru import logger
 from loguru_config import LoguruConfig
 
 from .configuration import Configuration
+from .configuration_cache import compile_configuration, load_cached_configuration
 from .core import KasaButtonsCore
+from .fleet import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_DEVICE_TIMEOUT,
+    FleetAction,
+    FleetResult,
+    KasaFleet,
+)
+from .recording import DEFAULT_TRACE_MAX_BYTES, TraceRecorder
+from .replay import ReplayKasaButtonsCore, TraceReplayer
+from .supervisor import KasaButtonsSupervisor
 
 if platform.system().lower() == "darwin":
     from .keyboard_handlers.pynput_handler import (
@@ -20,24 +35,305 @@ else:
 
 DEFAULT_CONFIG = "kasabuttons.toml"
 
+# options that only apply when running the button loop (no subcommand)
+RUN_ONLY_OPTIONS = ("record", "record_max_bytes", "replay", "replay_speed", "workers")
+
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.version_option()
 @click.option(
     "--config",
     default=DEFAULT_CONFIG,
     help=f"name of the configuration file (default: {DEFAULT_CONFIG})",
 )
-def main(config):
+@click.option(
+    "--no-config-cache",
+    is_flag=True,
+    help="always parse and validate the configuration file instead of using "
+    "the compiled copy cached from a previous run",
+)
+@click.option(
+    "--record",
+    default=None,
+    help="append button events and device timings to this JSONL trace file",
+)
+@click.option(
+    "--record-max-bytes",
+    default=DEFAULT_TRACE_MAX_BYTES,
+    show_default=True,
+    help="rotate the trace file once it reaches this size",
+)
+@click.option(
+    "--replay",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="replay the button events of a trace file against simulated devices",
+)
+@click.option(
+    "--replay-speed",
+    default=1.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="replay speed multiplier (0 replays as fast as possible)",
+)
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="number of worker processes to spread device connections across",
+)
+@click.pass_context
+def main(
+    ctx,
+    config,
+    no_config_cache,
+    record,
+    record_max_bytes,
+    replay,
+    replay_speed,
+    workers,
+):
+    ctx.obj = {"config": config, "no_config_cache": no_config_cache}
+    if ctx.invoked_subcommand is not None:
+        for name in RUN_ONLY_OPTIONS:
+            if ctx.get_parameter_source(name) != ParameterSource.DEFAULT:
+                option = "--" + name.replace("_", "-")
+                raise click.UsageError(
+                    f"{option} can't be used with the "
+                    f"{ctx.invoked_subcommand} subcommand"
+                )
+        return
+    if replay and workers > 1:
+        raise click.UsageError("--replay can't be combined with --workers")
     logger.info("kasabuttons CLI Started")
     logger.debug(f"config filename set to: {config}")
-    configuration = Configuration.load_from_file(config)
+    if no_config_cache:
+        configuration = Configuration.load_from_file(config)
+    else:
+        configuration = load_cached_configuration(config)
     if configuration.logging:
         LoguruConfig.load(configuration.logging.model_dump())
     logger.debug(f"configuration: {configuration}")
-    asyncio.run(
-        KasaButtonsCore.run(
-            configuration=configuration, keyboard_handler=AsyncKeyboardStatus
+    recorder = TraceRecorder(record, max_bytes=record_max_bytes) if record else None
+    try:
+        if replay:
+            logger.info(f"replaying trace: {replay}")
+            asyncio.run(
+                ReplayKasaButtonsCore.run(
+                    configuration=configuration,
+                    keyboard_handler=TraceReplayer(replay, speed=replay_speed),
+                    recorder=recorder,
+                )
+            )
+        elif workers > 1:
+            asyncio.run(
+                KasaButtonsSupervisor.run(
+                    configuration=configuration,
+                    keyboard_handler=AsyncKeyboardStatus,
+                    recorder=recorder,
+                    workers=workers,
+                )
+            )
+        else:
+            asyncio.run(
+                KasaButtonsCore.run(
+                    configuration=configuration,
+                    keyboard_handler=AsyncKeyboardStatus,
+                    recorder=recorder,
+                )
+            )
+    finally:
+        if recorder:
+            recorder.close()
+    logger.info("kasabuttons CLI Exiting")
+
+
+@main.command("check-config")
+@click.pass_context
+def check_config(ctx):
+    """
+    Validate the configuration file (the main --config option), refresh its
+    compiled cache and report how long loading takes with and without the cache.
+    """
+    config = ctx.obj["config"]
+    if ctx.obj["no_config_cache"]:
+        raise click.UsageError("check-config always refreshes the cache")
+    try:
+        compiled = compile_configuration(config, force=True)
+    except (OSError, ValueError, yaml.YAMLError) as ex:
+        # ValueError covers toml decode and pydantic validation errors
+        raise click.ClickException(f"{config}: {ex}")
+    cached = compile_configuration(config)
+    configuration = compiled.configuration
+    click.echo(f"{config}: OK")
+    click.echo(f"  buttons: {len(configuration.buttons)}")
+    click.echo(
+        f"  devices: {len({button.device_name for button in configuration.buttons})}"
+    )
+    click.echo(f"  parse + validate: {compiled.parse_time * 1000:.2f}ms")
+    if compiled.cache_file:
+        click.echo(
+            f"  compile (parse, validate, hash and cache write): "
+            f"{compiled.elapsed * 1000:.2f}ms"
+        )
+        click.echo(
+            f"  cached load: {cached.elapsed * 1000:.2f}ms"
+            f" ({'hit' if cached.cache_hit else 'miss'})"
         )
+        click.echo(f"  cache file: {compiled.cache_file}")
+    else:
+        click.echo("  not cached (files containing credentials are never cached)")
+
+
+def fleet_options(command):
+    """
+    options shared by the fleet (many device) subcommands.
+    """
+    options = [
+        click.option(
+            "--device",
+            "names",
+            multiple=True,
+            help="device name (alias) to act on, may be repeated (default: all)",
+        ),
+        click.option(
+            "--match", "pattern", default=None, help="glob pattern for device names"
+        ),
+        click.option(
+            "--concurrency",
+            default=DEFAULT_CONCURRENCY,
+            show_default=True,
+            type=click.IntRange(min=1),
+            help="maximum number of devices contacted at once",
+        ),
+        click.option(
+            "--timeout",
+            default=DEFAULT_DEVICE_TIMEOUT,
+            show_default=True,
+            help="seconds allowed per device",
+        ),
+        click.option(
+            "--discovery-timeout",
+            default=None,
+            type=int,
+            help="seconds to scan for devices (default: from the configuration)",
+        ),
+        click.option(
+            "--format",
+            "output_format",
+            type=click.Choice(["text", "json"]),
+            default="text",
+            show_default=True,
+            help="json writes one JSON object per device as it finishes",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _fleet_configuration(ctx, discovery_timeout: int | None) -> Configuration:
+    # fleet commands only need the credentials, so a config file is optional
+    config = ctx.obj["config"]
+    if not os.path.exists(config):
+        configuration = Configuration(buttons=[])
+    elif ctx.obj["no_config_cache"]:
+        configuration = Configuration.load_from_file(config)
+    else:
+        configuration = load_cached_configuration(config)
+    if discovery_timeout is not None:
+        configuration = configuration.model_copy(
+            update={"discovery_timeout": discovery_timeout}
+        )
+    return configuration
+
+
+def _echo_result(result: FleetResult, output_format: str):
+    if output_format == "json":
+        click.echo(json.dumps(result.to_dict()))
+        return
+    if result.error:
+        detail = result.error
+    else:
+        detail = "on" if result.is_on else "off"
+        if result.brightness is not None:
+            detail += f" brightness={result.brightness}"
+    click.echo(
+        f"{result.status.value:<8} {result.device:<32} {detail} ({result.elapsed:.2f}s)"
     )
-    logger.info("kasabuttons CLI Exiting")
+
+
+def _run_fleet(ctx, results, output_format: str):
+    async def consume():
+        count = failed = 0
+        async for result in results:
+            count += 1
+            failed += result.failed
+            _echo_result(result, output_format)
+        return count, failed
+
+    count, failed = asyncio.run(consume())
+    if output_format == "text":
+        click.echo(f"{count} devices, {failed} failed")
+    if failed:
+        ctx.exit(1)
+
+
+@main.command()
+@fleet_options
+@click.pass_context
+def status(ctx, names, pattern, concurrency, timeout, discovery_timeout, output_format):
+    """
+    Report the state of all (or the selected) devices.
+    """
+    configuration = _fleet_configuration(ctx, discovery_timeout)
+    fleet = KasaFleet(configuration, concurrency=concurrency, timeout=timeout)
+    _run_fleet(ctx, fleet.status(names=names, pattern=pattern), output_format)
+
+
+@main.command()
+@click.argument("action", type=click.Choice([action.value for action in FleetAction]))
+@click.argument("value", required=False, type=click.IntRange(1, 100))
+@click.option(
+    "--dim-states",
+    default="10,50,100",
+    show_default=True,
+    help="comma separated brightness states cycled by dim+ and dim-",
+)
+@fleet_options
+@click.pass_context
+def apply(
+    ctx,
+    action,
+    value,
+    dim_states,
+    names,
+    pattern,
+    concurrency,
+    timeout,
+    discovery_timeout,
+    output_format,
+):
+    """
+    Apply ACTION (on, off, toggle, dim+, dim- or brightness VALUE) to all (or
+    the selected) devices.
+    """
+    action = FleetAction(action)
+    if action == FleetAction.BRIGHTNESS and value is None:
+        raise click.UsageError("brightness requires a VALUE (1-100)")
+    try:
+        states = [int(state) for state in dim_states.split(",")]
+    except ValueError:
+        states = None
+    if not states or not all(1 <= state <= 100 for state in states):
+        raise click.BadParameter(
+            "must be comma separated integers between 1 and 100",
+            param_hint="--dim-states",
+        )
+    configuration = _fleet_configuration(ctx, discovery_timeout)
+    fleet = KasaFleet(configuration, concurrency=concurrency, timeout=timeout)
+    results = fleet.apply(
+        action, value=value, dim_states=states, names=names, pattern=pattern
+    )
+    _run_fleet(ctx, results, output_format)
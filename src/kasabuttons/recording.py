@@ -0,0 +1,136 @@
+import json
+import os
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime
+
+from loguru import logger
+
+from .buttons import ButtonEvent
+
+DEFAULT_TRACE_MAX_BYTES = 10 * 1024 * 1024  # 10 MiB per trace file
+DEFAULT_TRACE_BACKUP_COUNT = 3
+
+
+class TraceRecorder:
+    """
+    Append-only JSONL recorder for button events and device request timings.
+    Each line is one record; `t` is seconds since the recorder started
+    (monotonic clock) so traces can be replayed with their original spacing.
+    Files rotate like logging's RotatingFileHandler (`trace.jsonl` ->
+    `trace.jsonl.1` -> ... up to `backup_count`).
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        max_bytes: int = DEFAULT_TRACE_MAX_BYTES,
+        backup_count: int = DEFAULT_TRACE_BACKUP_COUNT,
+    ):
+        self.file_name = file_name
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._start = time.monotonic()
+        self._file = open(file_name, "a", encoding="utf-8")
+        self._write_start_record()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _offset(self, monotonic_time: float | None = None) -> float:
+        if monotonic_time is None:
+            monotonic_time = time.monotonic()
+        return round(monotonic_time - self._start, 6)
+
+    def _write_start_record(self):
+        self._write(
+            {
+                "t": self._offset(),
+                "kind": "start",
+                "time": datetime.now(UTC).isoformat(),
+            }
+        )
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.file_name}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.file_name}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.file_name, f"{self.file_name}.1")
+        self._file = open(self.file_name, "w", encoding="utf-8")
+        self._write_start_record()
+
+    def _write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        position = self._file.tell()
+        if self.max_bytes and position and position + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._file.flush()
+
+    def record_button_event(self, button_event: ButtonEvent):
+        """
+        records a button event as it is taken off the queue. `queue_wait` is the
+        time between the keyboard handler creating the event and the core
+        receiving it.
+        """
+        received = time.monotonic()
+        self._write(
+            {
+                "t": self._offset(button_event.created),
+                "kind": "button",
+                "character": button_event.character,
+                "long_press": button_event.long_press,
+                "queue_wait": round(received - button_event.created, 6),
+            }
+        )
+
+    def record_device_request(
+        self,
+        button_event: ButtonEvent,
+        device_name: str,
+        connect_time: float | None,
+        action_time: float | None,
+        total_time: float,
+        error: BaseException | None = None,
+    ):
+        """
+        records how long connecting to and acting on a device took for a
+        button event (times in seconds, `None` if that stage wasn't reached).
+        """
+        record = {
+            "t": self._offset(),
+            "kind": "device",
+            "character": button_event.character,
+            "device": device_name,
+            "connect": round(connect_time, 6) if connect_time is not None else None,
+            "action": round(action_time, 6) if action_time is not None else None,
+            "total": round(total_time, 6),
+        }
+        if error is not None:
+            record["error"] = repr(error)
+        self._write(record)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_trace(file_name: str) -> Iterator[dict]:
+    """
+    yields the records of a trace file, skipping (and logging) any lines that
+    can't be parsed, e.g. a partial line left behind by a killed process.
+    """
+    with open(file_name, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"skipping bad trace record {file_name}:{line_number}")
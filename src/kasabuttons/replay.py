@@ -0,0 +1,129 @@
+import asyncio
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+from .buttons import ButtonEvent
+from .configuration import Configuration
+from .core import KasaButtonsCore
+from .recording import read_trace
+
+
+@dataclass
+class ReplayDevice:
+    """
+    In-memory stand-in for a kasa Device used when replaying a trace.
+    Responds instantly so a replay measures the core itself, not the network.
+    """
+
+    alias: str
+    is_off: bool = False
+    state_information: dict = field(default_factory=dict)
+
+    async def turn_on(self):
+        self.is_off = False
+
+    async def turn_off(self):
+        self.is_off = True
+
+    async def set_brightness(self, value: int):
+        self.state_information["Brightness"] = value
+
+    async def update(self, *args, **kwargs):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    @property
+    def config(self) -> str:
+        return self.alias
+
+
+class ReplayKasaButtonsCore(KasaButtonsCore):
+    """
+    KasaButtonsCore that discovers and connects to `ReplayDevice`s built from
+    the configuration instead of real devices on the network.
+    """
+
+    def __init__(self, configuration: Configuration, recorder=None):
+        super().__init__(configuration, recorder=recorder)
+        self._replay_devices = {}
+        for button in configuration.buttons:
+            if button.device_name == "~LAST~":
+                continue
+            state_information = (
+                {"Brightness": button.dim_states[-1]} if button.dim_states else {}
+            )
+            self._replay_devices.setdefault(
+                button.device_name,
+                ReplayDevice(button.device_name, state_information=state_information),
+            )
+
+    async def _discover_devices(self) -> dict:
+        return dict(self._replay_devices)
+
+    async def _connect_device(self, device_config) -> ReplayDevice:
+        return self._replay_devices[device_config]
+
+
+class TraceReplayer:
+    """
+    Keyboard handler stand-in that feeds the button events of a recorded trace
+    into the core's queue. `speed` scales the original spacing between events
+    (2.0 replays twice as fast); a speed of 0 replays as fast as possible.
+    Recorded `exit` events are skipped and a single `exit` is sent at the end.
+    """
+
+    def __init__(self, file_name: str, speed: float = 1.0):
+        self.file_name = file_name
+        self.speed = speed
+        self._feed_task = None
+
+    def keyboard_button_handler(self, chars: list[str]):
+        queue = asyncio.Queue()
+        self._feed_task = asyncio.create_task(self._feed(queue, set(chars)))
+        return queue, self
+
+    @staticmethod
+    def _is_button_record(record) -> bool:
+        return (
+            isinstance(record, dict)
+            and record.get("kind") == "button"
+            and isinstance(record.get("character"), str)
+            and isinstance(record.get("t"), int | float)
+            and isinstance(record.get("long_press"), bool)
+        )
+
+    async def _feed(self, queue: asyncio.Queue, chars: set[str]):
+        previous_t = None
+        count = 0
+        try:
+            for record in read_trace(self.file_name):
+                if isinstance(record, dict) and record.get("kind") != "button":
+                    continue
+                if not self._is_button_record(record):
+                    logger.warning(f"skipping malformed trace record: {record!r}")
+                    continue
+                if record["character"] == "exit":
+                    continue
+                if record["character"] not in chars:
+                    logger.warning(
+                        f"trace character {record['character']} not configured"
+                    )
+                    continue
+                if previous_t is not None and self.speed > 0:
+                    await asyncio.sleep(max(record["t"] - previous_t, 0) / self.speed)
+                previous_t = record["t"]
+                queue.put_nowait(
+                    ButtonEvent(
+                        long_press=record["long_press"], character=record["character"]
+                    )
+                )
+                count += 1
+            logger.info(f"replayed {count} button events from {self.file_name}")
+        except (OSError, UnicodeDecodeError):
+            logger.exception(f"unable to read trace file {self.file_name}")
+        finally:
+            # always let the core loop finish, even if the trace is unusable
+            queue.put_nowait(ButtonEvent(long_press=False, character="exit"))
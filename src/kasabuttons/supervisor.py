@@ -0,0 +1,235 @@
+import asyncio
+import dataclasses
+import multiprocessing
+import signal
+import sys
+import threading
+from dataclasses import dataclass, field
+
+from kasa import DeviceConfig
+from loguru import logger
+from loguru_config import LoguruConfig
+
+from .buttons import ButtonEvent
+from .configuration import Configuration
+from .core import KasaButtonsCore
+from .keyboard_handlers.base_handler import BaseAsyncKeyboardStatus
+
+WORKER_JOIN_TIMEOUT = 5  # seconds to wait for a worker to exit before terminating
+
+
+@dataclass
+class RoutedButtonEvent(ButtonEvent):
+    """
+    ButtonEvent sent to a worker along with the device configuration the
+    coordinator resolved for it.
+    """
+
+    device_config: DeviceConfig | None = field(default=None, compare=False, repr=False)
+
+
+def assign_devices(configuration: Configuration, workers: int) -> dict[str, int]:
+    """
+    assigns each configured device to a worker (round robin over the sorted
+    device names) so every device is only ever connected to by one process.
+    """
+    device_names = sorted(
+        {
+            button.device_name
+            for button in configuration.buttons
+            if button.device_name != "~LAST~"
+        }
+    )
+    return {name: i % workers for i, name in enumerate(device_names)}
+
+
+class WorkerKasaButtonsCore(KasaButtonsCore):
+    """
+    Core running in a worker process. It doesn't listen to a keyboard or
+    discover devices; it acts on the `RoutedButtonEvent`s the coordinator puts
+    on its inbox until it receives `None`.
+    """
+
+    def _resolve_device_config(self, button_event: ButtonEvent) -> DeviceConfig | None:
+        return getattr(button_event, "device_config", None)
+
+    def _read_inbox(self, loop, inbox):
+        """
+        runs in a (daemon) thread, handing events from the coordinator to the
+        event loop the same way the keyboard handlers do.
+        """
+        while True:
+            button_event = inbox.get()
+            if button_event is None:
+                self._exit_requested = True
+                loop.call_soon_threadsafe(
+                    self._button_queue.put_nowait,
+                    ButtonEvent(long_press=False, character="exit"),
+                )
+                return
+            loop.call_soon_threadsafe(self._button_queue.put_nowait, button_event)
+
+    @classmethod
+    async def serve(cls, configuration: Configuration, inbox) -> bool:
+        """
+        acts on events from `inbox` until the coordinator sends `None`. Returns
+        False if the loop ended on its own (an unexpected exception), so the
+        worker can exit and be restarted instead of silently dropping events.
+        """
+        self = cls(configuration)
+        self._button_queue = asyncio.Queue()
+        self._exit_requested = False
+        threading.Thread(
+            target=self._read_inbox,
+            args=(asyncio.get_running_loop(), inbox),
+            daemon=True,
+        ).start()
+        await self.loop()
+        return self._exit_requested
+
+
+def _worker_main(index: int, configuration: Configuration, inbox):
+    # the coordinator handles Ctrl-C and tells the workers to exit
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if configuration.logging:
+        LoguruConfig.load(configuration.logging.model_dump())
+    logger.debug(f"worker {index} started")
+    if not asyncio.run(WorkerKasaButtonsCore.serve(configuration, inbox)):
+        logger.error(f"worker {index} stopped unexpectedly")
+        sys.exit(1)
+    logger.debug(f"worker {index} exiting")
+
+
+class KasaButtonsSupervisor(KasaButtonsCore):
+    """
+    Coordinator for running with several worker processes. It owns the keyboard
+    handler, discovery and the device registry (`update_device_list`) and
+    routes each button event, together with its resolved device configuration,
+    to the worker process that owns the target device. `~LAST~` buttons are
+    routed to the owner of the last device an event was routed to; unlike the
+    single process core this is updated when routing, not after a successful
+    connect, as the workers don't report back to the coordinator.
+    """
+
+    def __init__(self, configuration: Configuration, recorder=None):
+        super().__init__(configuration, recorder=recorder)
+        self._device_workers = {}
+        self._inboxes = []
+        self._processes = []
+        self._last_device_name = None
+
+    @classmethod
+    async def run(
+        cls,
+        configuration: Configuration,
+        keyboard_handler: BaseAsyncKeyboardStatus,
+        recorder=None,
+        workers: int = 2,
+    ):
+        """
+        sets up the coordinator, starts the worker processes and routes events
+        until the `exit` character is received.
+        """
+        self = await cls.create(
+            configuration=configuration,
+            keyboard_handler=keyboard_handler,
+            recorder=recorder,
+        )
+        self.start_workers(workers)
+        try:
+            await self.loop()
+        finally:
+            await asyncio.to_thread(self.stop_workers)
+
+    def start_workers(self, workers: int):
+        device_count = len(assign_devices(self.configuration, workers=1))
+        workers = max(1, min(workers, device_count))
+        self._device_workers = assign_devices(self.configuration, workers)
+        for index in range(workers):
+            inbox, process = self._spawn_worker(index)
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+        logger.info(f"started {workers} worker processes")
+
+    def _spawn_worker(self, index: int):
+        # spawn (not fork): the keyboard handlers run their own threads
+        context = multiprocessing.get_context("spawn")
+        inbox = context.Queue()
+        process = context.Process(
+            target=_worker_main,
+            args=(index, self.configuration, inbox),
+            name=f"kasabuttons-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return inbox, process
+
+    def _ensure_worker(self, index: int):
+        """
+        restarts a worker that has died (crash, OOM kill, ...) so the devices
+        it owns keep responding. Events still queued for it are lost.
+        """
+        process = self._processes[index]
+        if process.is_alive():
+            return
+        logger.error(
+            f"worker {process.name} exited unexpectedly "
+            f"(exit code {process.exitcode}), restarting it"
+        )
+        old_inbox = self._inboxes[index]
+        old_inbox.close()
+        # don't block shutdown flushing events nobody will read
+        old_inbox.cancel_join_thread()
+        self._inboxes[index], self._processes[index] = self._spawn_worker(index)
+
+    def stop_workers(self):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(WORKER_JOIN_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f"terminating unresponsive worker {process.name}")
+                process.terminate()
+        self._inboxes = []
+        self._processes = []
+
+    def _route(self, button_event: ButtonEvent):
+        """
+        sends a button event to the worker owning its target device.
+        """
+        device_name = self._button_actions[button_event.character].device_name
+        if device_name == "~LAST~":
+            device_name = self._last_device_name
+        device_config = self._get_device_config(button_event.character)
+        if device_config is None or device_name is None:
+            return
+        self._last_device_name = device_name
+        self._last_device_config = device_config
+        worker = self._device_workers[device_name]
+        self._ensure_worker(worker)
+        logger.debug(f"routing {button_event} to worker {worker}")
+        self._inboxes[worker].put(
+            RoutedButtonEvent(
+                long_press=button_event.long_press,
+                character=button_event.character,
+                created=button_event.created,
+                # a user supplied http client session can't cross processes
+                device_config=dataclasses.replace(device_config, http_client=None),
+            )
+        )
+
+    @logger.catch
+    async def loop(self):
+        """
+        routes button events to the workers until the `exit` character is pressed.
+        """
+        while True:
+            button_event = await self._button_queue.get()
+            if self._recorder:
+                self._recorder.record_button_event(button_event)
+            if button_event.character in self._button_actions:
+                self._route(button_event)
+            elif button_event.character == "exit":
+                logger.debug("received 'exit' character")
+                await self._stop_background_update()
+                break
@@ -1,5 +1,97 @@
+import json
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from kasabuttons.kasa_cli import main
+from kasabuttons.replay import ReplayDevice
+
 # TODO: again... not sure how best to do this
 
 
 def test_cli_simple():
     assert True
+
+
+def test_cli_check_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["--config", "./tests/fixtures/testconfig.toml", "check-config"]
+    )
+    assert result.exit_code == 0
+    assert "buttons: 1" in result.output
+    assert "parse + validate" in result.output
+    assert "cached load" in result.output
+
+    result = runner.invoke(
+        main, ["--config", "./tests/fixtures/testinvalid.toml", "check-config"]
+    )
+    assert result.exit_code != 0
+
+
+def test_cli_status_json(tmp_path):
+    class MockDiscover:
+        @classmethod
+        async def discover(cls, *args, **kwargs):
+            return {"plug": ReplayDevice("plug", is_off=True)}
+
+    with patch("kasabuttons.core.Discover", MockDiscover):
+        result = CliRunner().invoke(
+            main,
+            ["--config", str(tmp_path / "missing.toml"), "status", "--format", "json"],
+        )
+    assert result.exit_code == 0
+    assert json.loads(result.output) == {
+        "device": "plug",
+        "host": None,
+        "status": "ok",
+        "elapsed": json.loads(result.output)["elapsed"],
+        "is_on": False,
+        "brightness": None,
+        "error": None,
+    }
+
+
+def test_cli_negative_replay_speed(tmp_path):
+    trace_file = tmp_path / "trace.jsonl"
+    trace_file.write_text("")
+    result = CliRunner().invoke(
+        main, ["--replay", str(trace_file), "--replay-speed", "-1"]
+    )
+    assert result.exit_code == 2
+    assert "--replay-speed" in result.output
+
+
+def test_cli_run_only_options_rejected_with_subcommand():
+    result = CliRunner().invoke(main, ["--workers", "2", "status"])
+    assert result.exit_code == 2
+    assert "--workers can't be used with the status subcommand" in result.output
+
+
+def test_cli_status_no_config_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    class MockDiscover:
+        @classmethod
+        async def discover(cls, *args, **kwargs):
+            return {}
+
+    with patch("kasabuttons.core.Discover", MockDiscover):
+        result = CliRunner().invoke(
+            main,
+            [
+                "--config",
+                "./tests/fixtures/testconfig.toml",
+                "--no-config-cache",
+                "status",
+            ],
+        )
+    assert result.exit_code == 0
+    assert not (tmp_path / "kasabuttons").exists()
+
+
+def test_cli_apply_dim_states_range():
+    result = CliRunner().invoke(main, ["apply", "dim+", "--dim-states", "10,50,150"])
+    assert result.exit_code == 2
+    assert "between 1 and 100" in result.output
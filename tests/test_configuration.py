@@ -1,7 +1,10 @@
+import os
+import shutil
 import tomllib
 
 import pytest
 from kasabuttons.configuration import Configuration
+from kasabuttons.configuration_cache import cache_file_for, compile_configuration
 
 
 def test_good_toml_configuration():
@@ -21,9 +24,81 @@ def test_invalid_toml_configuration():
         Configuration.load_from_file("./tests/fixtures/testinvalid.toml")
 
 
+def test_good_yaml_configuration(tmp_path):
+    config_file = tmp_path / "kasabuttons.yaml"
+    config_file.write_text(
+        "buttons:\n"
+        "  - button_text: b\n"
+        "    device_name: Smart Plug\n"
+        "    long_press: toggle\n"
+        "    short_press: toggle\n"
+    )
+    configuration = Configuration.load_from_file(str(config_file))
+    assert configuration.buttons[0].device_name == "Smart Plug"
+
+
+def test_compiled_configuration_cache(tmp_path):
+    config_file = tmp_path / "testconfig.toml"
+    shutil.copy("./tests/fixtures/testconfig.toml", config_file)
+    cache_dir = tmp_path / "cache"
+
+    compiled = compile_configuration(str(config_file), cache_dir=cache_dir)
+    assert not compiled.cache_hit
+    assert 0 < compiled.parse_time <= compiled.elapsed
+    assert compiled.cache_file == cache_file_for(str(config_file), cache_dir)
+    assert compiled.cache_file.exists()
+
+    compiled = compile_configuration(str(config_file), cache_dir=cache_dir)
+    assert compiled.cache_hit
+    assert compiled.parse_time is None
+    assert compiled.configuration.buttons[0].device_name == "Smart Bulb1"
+
+    # touching the file without changing it is still a hit (same sha256)
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert compile_configuration(str(config_file), cache_dir=cache_dir).cache_hit
+
+    config_file.write_text(
+        config_file.read_text().replace("Smart Bulb1", "Smart Bulb2")
+    )
+    compiled = compile_configuration(str(config_file), cache_dir=cache_dir)
+    assert not compiled.cache_hit
+    assert compiled.configuration.buttons[0].device_name == "Smart Bulb2"
+
+
+def test_compiled_configuration_credentials(tmp_path, monkeypatch):
+    config_file = tmp_path / "testconfig.toml"
+    shutil.copy("./tests/fixtures/testconfig.toml", config_file)
+    cache_dir = tmp_path / "cache"
+
+    monkeypatch.setenv("KASA_PASSWORD", "s3cret")
+    compiled = compile_configuration(str(config_file), cache_dir=cache_dir)
+    assert compiled.configuration.kasa_password == "s3cret"
+    assert "s3cret" not in compiled.cache_file.read_text()
+
+    # credentials always come from the current environment, even on a hit
+    monkeypatch.setenv("KASA_PASSWORD", "changed")
+    compiled = compile_configuration(str(config_file), cache_dir=cache_dir)
+    assert compiled.cache_hit
+    assert compiled.configuration.kasa_password == "changed"
+
+    # a file holding credentials itself is never cached
+    config_file.write_text('kasa_password = "infile"\n' + config_file.read_text())
+    compiled = compile_configuration(str(config_file), cache_dir=cache_dir)
+    assert compiled.configuration.kasa_password == "infile"
+    assert compiled.cache_file is None
+    assert "infile" not in "".join(p.read_text() for p in cache_dir.iterdir())
+
+
+def test_compiled_configuration_invalid(tmp_path):
+    with pytest.raises(tomllib.TOMLDecodeError):
+        compile_configuration(
+            "./tests/fixtures/testinvalid.toml", cache_dir=tmp_path / "cache"
+        )
+
+
 # TODO: tests to write
 # test_bad_toml_configuration ... pydantic validation error stuff
-# test_good_yaml_configuration
 # test_invalid_yaml_configuration
 # test_bad_yaml_configuration
 # test some additional configuration edge cases like:
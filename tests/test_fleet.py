@@ -0,0 +1,144 @@
+import asyncio
+from dataclasses import dataclass
+from unittest.mock import patch
+
+import pytest
+from kasa import KasaException
+
+from kasabuttons.configuration import Configuration
+from kasabuttons.fleet import FleetAction, FleetStatus, KasaFleet
+from kasabuttons.replay import ReplayDevice
+
+
+@dataclass
+class SlowDevice(ReplayDevice):
+    async def update(self, *args, **kwargs):
+        await asyncio.sleep(10)
+
+
+@dataclass
+class BrokenDevice(ReplayDevice):
+    async def update(self, *args, **kwargs):
+        raise KasaException("unable to connect")
+
+
+@dataclass
+class CountingDevice(ReplayDevice):
+    updates: int = 0
+
+    async def update(self, *args, **kwargs):
+        self.updates += 1
+
+
+@dataclass
+class StrictBulb(ReplayDevice):
+    async def set_brightness(self, value: int):
+        # like python-kasa for values outside 0-100
+        raise ValueError(f"Invalid brightness value: {value}")
+
+
+def mock_discover(devices):
+    class MockDiscover:
+        @classmethod
+        async def discover(cls, *args, **kwargs):
+            return {f"10.0.0.{i}": device for i, device in enumerate(devices)}
+
+    return MockDiscover
+
+
+@pytest.fixture
+def test_configuration():
+    return Configuration(_env_file=None, buttons=[])
+
+
+async def collect(results):
+    return {result.device: result async for result in results}
+
+
+@pytest.mark.asyncio
+async def test_status(test_configuration):
+    devices = [
+        ReplayDevice("kitchen bulb", state_information={"Brightness": 50}),
+        ReplayDevice("kitchen plug", is_off=True),
+        SlowDevice("porch"),
+        BrokenDevice("garage"),
+    ]
+    fleet = KasaFleet(test_configuration, concurrency=2, timeout=0.1)
+    with patch("kasabuttons.core.Discover", mock_discover(devices)):
+        results = await collect(fleet.status())
+    assert results["kitchen bulb"].status == FleetStatus.OK
+    assert results["kitchen bulb"].is_on and results["kitchen bulb"].brightness == 50
+    assert results["kitchen plug"].is_on is False
+    assert results["porch"].status == FleetStatus.TIMEOUT
+    assert results["garage"].status == FleetStatus.ERROR
+    assert results["garage"].failed
+    assert results["garage"].to_dict()["status"] == "error"
+
+
+@pytest.mark.asyncio
+async def test_apply(test_configuration):
+    devices = [
+        ReplayDevice("kitchen bulb", state_information={"Brightness": 50}),
+        ReplayDevice("kitchen plug"),
+        ReplayDevice("bedroom bulb", state_information={"Brightness": 100}),
+    ]
+    fleet = KasaFleet(test_configuration)
+    with patch("kasabuttons.core.Discover", mock_discover(devices)):
+        results = await collect(
+            fleet.apply(FleetAction.BRIGHTNESS, value=40, pattern="kitchen*")
+        )
+        assert set(results) == {"kitchen bulb", "kitchen plug"}
+        assert results["kitchen bulb"].brightness == 40
+        assert results["kitchen plug"].status == FleetStatus.SKIPPED
+        assert devices[2].state_information["Brightness"] == 100
+
+        results = await collect(
+            fleet.apply(FleetAction.OFF, names=("kitchen plug", "bedroom bulb"))
+        )
+        assert set(results) == {"kitchen plug", "bedroom bulb"}
+        assert devices[1].is_off and devices[2].is_off and not devices[0].is_off
+
+        results = await collect(
+            fleet.apply(FleetAction.DIMMINUS, dim_states=[10, 50, 100])
+        )
+        assert devices[0].state_information["Brightness"] == 10
+
+
+@pytest.mark.asyncio
+async def test_apply_selected_devices_only(test_configuration):
+    devices = [
+        ReplayDevice("Desk Lamp"),
+        CountingDevice("Porch Light"),
+        # e.g. an unreachable Tapo device, no alias before update()
+        BrokenDevice(None),
+    ]
+    fleet = KasaFleet(test_configuration)
+    with patch("kasabuttons.core.Discover", mock_discover(devices)):
+        results = await collect(fleet.apply(FleetAction.OFF, names=("Desk Lamp",)))
+    assert set(results) == {"Desk Lamp"}
+    assert not results["Desk Lamp"].failed
+    assert devices[0].is_off and not devices[1].is_off
+    # unselected devices with a known alias are never connected to
+    assert devices[1].updates == 0
+
+    # without a filter, the unidentified device's failure is reported
+    with patch("kasabuttons.core.Discover", mock_discover(devices)):
+        results = await collect(fleet.status())
+    assert [result.failed for result in results.values()].count(True) == 1
+
+
+@pytest.mark.asyncio
+async def test_apply_unexpected_device_error(test_configuration):
+    devices = [
+        StrictBulb("hall bulb", state_information={"Brightness": 100}),
+        ReplayDevice("desk bulb", state_information={"Brightness": 50}),
+    ]
+    fleet = KasaFleet(test_configuration)
+    with patch("kasabuttons.core.Discover", mock_discover(devices)):
+        results = await collect(
+            fleet.apply(FleetAction.DIMPLUS, dim_states=[10, 50, 150])
+        )
+    assert results["hall bulb"].status == FleetStatus.ERROR
+    assert "Invalid brightness" in results["hall bulb"].error
+    assert results["desk bulb"].status == FleetStatus.OK
+    assert results["desk bulb"].brightness == 150
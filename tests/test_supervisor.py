@@ -0,0 +1,149 @@
+import asyncio
+import queue
+
+import pytest
+from kasa import DeviceConfig
+
+from kasabuttons.buttons import ButtonEvent
+from kasabuttons.configuration import Configuration
+from kasabuttons.replay import ReplayDevice
+from kasabuttons.supervisor import (
+    KasaButtonsSupervisor,
+    RoutedButtonEvent,
+    WorkerKasaButtonsCore,
+    assign_devices,
+)
+
+
+@pytest.fixture
+def test_configuration():
+    config_data = {
+        "buttons": [
+            {
+                "button_text": "a",
+                "device_name": "mockbulb",
+                "long_press": "dim+",
+                "short_press": "toggle",
+                "dim_states": [10, 50, 100],
+            },
+            {
+                "button_text": "b",
+                "device_name": "mockplug",
+                "long_press": "toggle",
+                "short_press": "toggle",
+            },
+            {
+                "button_text": "c",
+                "device_name": "~LAST~",
+                "long_press": "toggle",
+                "short_press": "toggle",
+            },
+        ]
+    }
+    return Configuration(_env_file=None, **config_data)
+
+
+def test_assign_devices(test_configuration):
+    assert assign_devices(test_configuration, workers=2) == {
+        "mockbulb": 0,
+        "mockplug": 1,
+    }
+    assert set(assign_devices(test_configuration, workers=1).values()) == {0}
+
+
+class AliveProcess:
+    name = "stub"
+
+    def is_alive(self):
+        return True
+
+
+def test_route(test_configuration):
+    supervisor = KasaButtonsSupervisor(test_configuration)
+    supervisor._device_workers = assign_devices(test_configuration, workers=2)
+    supervisor._inboxes = [queue.Queue(), queue.Queue()]
+    supervisor._processes = [AliveProcess(), AliveProcess()]
+    bulb_config = DeviceConfig(host="192.0.2.1")
+    supervisor._button_device_mapping = {"a": bulb_config, "b": None}
+
+    # no device config (device not discovered) and no last device yet
+    supervisor._route(ButtonEvent(long_press=False, character="b"))
+    supervisor._route(ButtonEvent(long_press=False, character="c"))
+    assert supervisor._inboxes[0].empty() and supervisor._inboxes[1].empty()
+
+    supervisor._route(ButtonEvent(long_press=True, character="a"))
+    supervisor._route(ButtonEvent(long_press=False, character="c"))
+    routed = [supervisor._inboxes[0].get_nowait() for _ in range(2)]
+    assert [event.character for event in routed] == ["a", "c"]
+    assert all(event.device_config == bulb_config for event in routed)
+    assert supervisor._inboxes[1].empty()
+
+
+@pytest.mark.asyncio
+async def test_worker_core(test_configuration):
+    devices = {"mockbulb": ReplayDevice("mockbulb", state_information={})}
+
+    class TestWorker(WorkerKasaButtonsCore):
+        async def _connect_device(self, device_config):
+            return devices[device_config]
+
+    inbox = queue.Queue()
+    inbox.put(RoutedButtonEvent(long_press=False, character="a", device_config=None))
+    inbox.put(
+        RoutedButtonEvent(long_press=False, character="a", device_config="mockbulb")
+    )
+    inbox.put(None)
+    assert await TestWorker.serve(test_configuration, inbox)
+    assert devices["mockbulb"].is_off
+
+
+@pytest.mark.asyncio
+async def test_worker_core_stops_on_crash(test_configuration):
+    class CrashingWorker(WorkerKasaButtonsCore):
+        async def _connect_device(self, device_config):
+            return ReplayDevice("mockbulb", state_information={"Brightness": 100})
+
+        async def _perform_action(self, device, button_event):
+            # e.g. python-kasa rejecting an out of range brightness
+            raise ValueError("Invalid brightness value: 150")
+
+    inbox = queue.Queue()
+    for _ in range(2):
+        inbox.put(
+            RoutedButtonEvent(long_press=True, character="a", device_config="mockbulb")
+        )
+    # no None sentinel: serve must return on its own, reporting the failure
+    assert not await asyncio.wait_for(
+        CrashingWorker.serve(test_configuration, inbox), timeout=5
+    )
+
+
+def test_start_and_stop_workers(test_configuration):
+    supervisor = KasaButtonsSupervisor(test_configuration)
+    supervisor.start_workers(workers=4)
+    # capped at the number of configured devices
+    assert len(supervisor._processes) == 2
+    processes = supervisor._processes
+    supervisor.stop_workers()
+    assert all(process.exitcode == 0 for process in processes)
+
+
+def test_route_restarts_dead_worker(test_configuration):
+    supervisor = KasaButtonsSupervisor(test_configuration)
+    supervisor.start_workers(workers=2)
+    try:
+        dead = supervisor._processes[0]
+        dead.terminate()
+        dead.join()
+        # nothing listens on port 1, so the worker fails the connect quickly
+        supervisor._button_device_mapping = {
+            "a": DeviceConfig(host="127.0.0.1", port_override=1)
+        }
+        supervisor._route(ButtonEvent(long_press=False, character="a"))
+        restarted = supervisor._processes[0]
+        assert restarted is not dead
+        assert restarted.is_alive()
+        processes = supervisor._processes
+    finally:
+        supervisor.stop_workers()
+    assert all(process.exitcode == 0 for process in processes)